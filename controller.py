@@ -1,39 +1,51 @@
-from typing import Callable
+from typing import Callable, ClassVar, Dict
+
+import numpy as np
 
 from methods.conjugate_gradients import ConjugateGradients
 from methods.conjugate_gradients_1st_modification import ConjugateGradientsFirstModification
 from methods.conjugate_gradients_2nd_modification import ConjugateGradientsSecondModification
 from methods.conjugate_gradients_3rd_modification import ConjugateGradientsThirdModification
-from mathematics.modification import get_alpha_k_single_factor_minimization, get_alpha_k_doubling_method
-from mathematics.general import convert_y_values_to_plot
+from mathematics.modification import (get_alpha_k_single_factor_minimization, get_alpha_k_doubling_method,
+                                      get_alpha_k_armijo_backtracking, get_alpha_k_grid_search, get_alpha_0)
+from mathematics.general import convert_y_values_to_plot, parse_function
 from drawing.plotter import make_plot
 
 
 class Controller:
+    # In order to add a new method, it is necessary to specify the method name as the key and the method class (or
+    # the alpha calculating function) as the value in the corresponding dictionary.
+    _METHODS: ClassVar[Dict[str, Callable]] = {
+        "Conjugate Gradients": ConjugateGradients,
+        "Conjugate Gradients 1st Modification": ConjugateGradientsFirstModification,
+        "Conjugate Gradients 2nd Modification": ConjugateGradientsSecondModification,
+        "Conjugate Gradients 3rd Modification": ConjugateGradientsThirdModification
+    }
+
+    _ALPHA_METHODS: ClassVar[Dict[str, Callable]] = {
+        "Single-Factor Minimization": get_alpha_k_single_factor_minimization,
+        "Doubling Method": get_alpha_k_doubling_method,
+        "Armijo Backtracking": get_alpha_k_armijo_backtracking,
+        "Grid Search": get_alpha_k_grid_search
+    }
+
     def __init__(self, settings: dict):
         self._settings = settings
 
-    @staticmethod
-    def _get_minimization_method(method_name: str) -> Callable:
+    @classmethod
+    def _get_minimization_method(cls, method_name: str) -> Callable:
         """
         Using the Factory Method design pattern, we simplify the process of creating instances of minimization method
         classes. Thus, only those instances of minimization methods that are needed will be created.
         In order to add a new method, it is necessary to specify the method name as the key and the method class as
-        the value in the methods_dict variable.
+        the value in the _METHODS class attribute.
 
         :param method_name: String parameter with the name of the method.
         :return: Required class without initialization
         """
 
-        methods_dict = {
-            "Conjugate Gradients": ConjugateGradients,
-            "Conjugate Gradients 1st Modification": ConjugateGradientsFirstModification,
-            "Conjugate Gradients 2nd Modification": ConjugateGradientsSecondModification,
-            "Conjugate Gradients 3rd Modification": ConjugateGradientsThirdModification
-        }
-
         try:
-            return methods_dict[method_name]
+            return cls._METHODS[method_name]
         except KeyError:
             raise KeyError(f"Wrong Method Name: {method_name}")
 
@@ -46,20 +58,20 @@ class Controller:
         :return: Required alpha calculating function without calling it.
         """
 
-        methods_dict = {
-            "Single-Factor Minimization": get_alpha_k_single_factor_minimization,
-            "Doubling Method": get_alpha_k_doubling_method
-        }
+        # the selection is walked once, counting the selected options without building a list of them
+        method_name = None
+        selected_methods_number = 0
+        for k, v in self._settings["Alpha k Selection"].items():
+            if v:
+                method_name = k
+                selected_methods_number += 1
 
-        selected_methods = [k for k, v in self._settings["Alpha k Selection"].items() if v]
-        if len(selected_methods) != 1:
+        if selected_methods_number != 1:
             raise Exception(f"Only one alpha calculating method could be selected. It has been selected "
-                            f"{len(selected_methods)} methods")
-        else:
-            method_name = selected_methods[0]
+                            f"{selected_methods_number} methods")
 
         try:
-            return methods_dict[method_name]
+            return self._ALPHA_METHODS[method_name]
         except KeyError:
             raise KeyError(f"Wrong Method Name: {method_name}")
 
@@ -67,28 +79,51 @@ class Controller:
         # select the necessary alpha calculation method without calling it. It will be passed to the calculator classes
         alpha_k_method = self._get_alpha_k_calculating_method()
 
-        # selecting all the methods, which have 'True' value
-        selected_methods = [k for k, v in self._settings["Methods Selection"].items() if v]
+        # selecting all the methods, which have 'True' value. The classes are looked up in the same pass, so a wrong
+        # method name fails before any calculations are made
+        selected_methods = tuple(self._get_minimization_method(method_name=k)
+                                 for k, v in self._settings["Methods Selection"].items() if v)
         if len(selected_methods) == 0:
             raise Exception("Please, select any minimization method")
 
+        # the function is parsed only once, so all the methods share the same expression and its cached derivatives
+        function = parse_function(self._settings["Function Settings"]["Function"])
+
+        # the coordinates are converted once to C-contiguous float64 arrays, which are used by all the methods
+        x_0 = np.ascontiguousarray(self._settings["Function Settings"]["Starting Coordinates"], dtype=np.float64)
+        min_point = np.ascontiguousarray(self._settings["Function Settings"]["Specified Minimum Coordinates"],
+                                         dtype=np.float64)
+
+        # all the methods make the same first step from x_0 along the antigradient, so its alpha is calculated once
+        alpha_0 = get_alpha_0(function=function,
+                              free_symbols=sorted(function.free_symbols, key=lambda sym: sym.name),
+                              x_0=x_0,
+                              dimension=len(x_0),
+                              alpha_k_calculating_method=alpha_k_method)
+
+        plot = self._settings["Plotter Settings"]["Plot"]
         methods_result_list = []
 
-        for selected_method_name in selected_methods:
+        for method in selected_methods:
             # initialize calculator class
-            method = self._get_minimization_method(method_name=selected_method_name)
-            method_instance = method(function=self._settings["Function Settings"]["Function"],
-                                     x_0=self._settings["Function Settings"]["Starting Coordinates"],
-                                     min_point=self._settings["Function Settings"]["Specified Minimum Coordinates"],
+            method_instance = method(function=function,
+                                     x_0=x_0,
+                                     min_point=min_point,
                                      accuracy=self._settings["Function Settings"]["Accuracy"],
                                      iteration_threshold=self._settings["Function Settings"]["Iteration Threshold"],
-                                     alpha_k_calculating_method=alpha_k_method)
+                                     alpha_k_calculating_method=alpha_k_method,
+                                     alpha_0=alpha_0)
 
             result_list, function_value_at_known_point = method_instance.run_method()
 
-            methods_result_list.append({"name": method_instance,
-                                        "x": [i for i in range(len(result_list))],
-                                        "y": convert_y_values_to_plot(result_list, function_value_at_known_point)})
-
-        if self._settings["Plotter Settings"]["Plot"]:
-            make_plot(methods_result_list)
+            # the plot data is prepared only if it is going to be drawn
+            if plot:
+                methods_result_list.append((method_instance, result_list))
+
+        if plot:
+            # the values of all the methods are converted at once, the known minimum is the same for all of them
+            y_values = np.split(convert_y_values_to_plot(np.concatenate([result for _, result in methods_result_list]),
+                                                         function_value_at_known_point),
+                                np.cumsum([len(result) for _, result in methods_result_list[:-1]]))
+            make_plot([{"name": method_instance, "x": np.arange(len(y)), "y": y}
+                       for (method_instance, _), y in zip(methods_result_list, y_values)])
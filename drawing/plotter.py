@@ -1,40 +1,36 @@
-import matplotlib.pyplot as plt
-from itertools import cycle, islice
 from typing import List, Dict
 
 
-def get_styles(methods_number: int) -> list:
-    """
-    Function accepts as an input parameter the number of methods to be displayed on the plot. Knowing this number,
-    the function repeats the available styles in a circle. Thus, the output is a list of available styles for the graph,
-    the same length as the number of methods to be plotted.
-
-    :param methods_number: The number of input methods to be plotted.
-    :return: List of available styles that are repeated a given number of times.
-    """
-    available_styles = ["-", "--", "-.", ":"]
-    return list(islice(cycle(available_styles), 0, methods_number + 1))
+# available line styles, which are repeated in a circle, if there are more methods than styles
+_STYLES = ("-", "--", "-.", ":")
 
 
-def make_plot(list_of_results: List[Dict]) -> None:
+def make_plot(list_of_results: List[Dict], ax=None) -> None:
     """
     Function plots dependency graphs for the selected methods. It accepts an unlimited number of dictionaries with all
-    necessary information for graphing.
+    necessary information for graphing. Matplotlib is imported only when the plot is actually made, so the runs
+    without plotting do not pay for its import.
 
     The input dictionaries must be as follows:
     {"name": "Method Name", "x": Dict[int], "y": Dict[float | int]}
+
+    :param list_of_results: List of dictionaries with the data of each method.
+    :param ax: Optional matplotlib Axes to draw on. It allows to reuse one figure, e.g. in parameter sweeps. If it is
+               not given, a new figure is created and shown.
     """
-    fig, ax = plt.subplots()
+    import matplotlib.pyplot as plt
 
-    list_of_styles = get_styles(len(list_of_results))
+    show = ax is None
+    if show:
+        fig, ax = plt.subplots()
 
     for index, method_dict in enumerate(list_of_results):
-        x, y = method_dict["x"], method_dict["y"]
-        ax.plot(x, y, linestyle=list_of_styles[index], label=method_dict["name"])
+        ax.plot(method_dict["x"], method_dict["y"], linestyle=_STYLES[index % len(_STYLES)], label=method_dict["name"])
 
     ax.set_title("Comparing modifications")
     ax.set_xlabel("Number of iterations")
     ax.set_ylabel("log |f(x) - f(x*)|")
     ax.legend()
 
-    plt.show()
+    if show:
+        plt.show()
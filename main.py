@@ -19,7 +19,9 @@ settings = {
 
     "Alpha k Selection": {
         "Single-Factor Minimization": True,
-        "Doubling Method": False
+        "Doubling Method": False,
+        "Armijo Backtracking": False,
+        "Grid Search": False
     },
 
     "Plotter Settings": {
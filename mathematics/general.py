@@ -1,70 +1,218 @@
 import sympy
 import numpy as np
 
-from typing import List, Dict
+from sympy.parsing.sympy_parser import parse_expr, standard_transformations, convert_xor
 
+from functools import lru_cache
+from typing import List, Tuple, Callable
 
-def get_derivative(function: sympy.core.add.Add,
-                   symbol: sympy.Symbol) -> sympy.core.add.Add:
+try:
+    import symengine
+except ImportError:
+    symengine = None
+
+
+# the same transformations as sympy.sympify() uses for strings, so '^' is still treated as a power
+FUNCTION_PARSING_TRANSFORMATIONS = standard_transformations + (convert_xor,)
+
+
+@lru_cache(maxsize=None)
+def _parse_function_string(function: str) -> sympy.Expr:
+    """
+    Function parses the string with the function. The result is cached by the string, so the same function is parsed
+    only once.
+
+    :param function: Function in a string format.
+
+    :return: Parsed sympy expression.
+    """
+
+    return parse_expr(function, transformations=FUNCTION_PARSING_TRANSFORMATIONS)
+
+
+def parse_function(function: str | sympy.Expr) -> sympy.Expr:
     """
-    This function takes the derivative of origin function which was transformed with sympy.sympify()
+    Function converts the function to sympy expression. Already parsed expressions are returned as is, strings are
+    parsed with sympy.parse_expr() instead of sympy.sympify(), which tries other conversions before parsing.
+
+    :param function: Function in a string format or already parsed sympy expression.
+
+    :return: Sympy expression.
+    """
+
+    if isinstance(function, sympy.Expr):
+        return function
+    return _parse_function_string(function)
+
+
+def _get_jacobian_with_symengine(function: sympy.core.add.Add,
+                                 free_symbols: Tuple[sympy.Symbol, ...]) -> sympy.Matrix | None:
+    """
+    Function calculates the Jacobian of origin function with symengine, which differentiates much faster than sympy,
+    and converts it back to sympy. Symengine does not know the assumptions of symbols and leaves derivatives of some
+    functions unevaluated, so such results (as well as the functions symengine can not convert) are rejected.
 
     :param function: Function, which was transformed with sympy.sympify().
-    :param symbol: sympy.Symbol - unique origin function variable.
+    :param free_symbols: Tuple, which contains unique sympy.Symbols of variables from origin function.
 
-    :return: Function derivative.
+    :return: sympy.Matrix with one row of partial derivatives or None, if symengine can not be used.
     """
 
-    return sympy.diff(function, symbol)
+    try:
+        jacobian = sympy.Matrix(symengine.Matrix([symengine.sympify(function)]).jacobian(
+            symengine.Matrix(list(free_symbols))))
+    except (RuntimeError, TypeError, NotImplementedError, sympy.SympifyError):
+        return None
+
+    if jacobian.has(sympy.Derivative) or not jacobian.free_symbols <= set(free_symbols):
+        return None
+    return jacobian
 
 
-def get_anti_derivative(function: sympy.core.add.Add,
-                        symbol: sympy.Symbol) -> sympy.core.add.Add:
+@lru_cache(maxsize=None)
+def get_jacobian(function: sympy.core.add.Add,
+                 free_symbols: Tuple[sympy.Symbol, ...]) -> sympy.Matrix:
     """
-    This function takes the antiderivative of origin function which was transformed with sympy.sympify()
+    This function builds the Jacobian of origin function, which is a row of all its partial derivatives. It is
+    calculated at once and cached, so all the numeric functions, which need the gradient, share it. Symengine is an
+    optional dependency, if it is installed, it is used for differentiation, otherwise sympy is used.
 
     :param function: Function, which was transformed with sympy.sympify().
-    :param symbol: sympy.Symbol - unique origin function variable.
+    :param free_symbols: Tuple, which contains unique sympy.Symbols of variables from origin function.
 
-    :return: Function antiderivative.
+    :return: sympy.Matrix with one row of partial derivatives.
     """
 
-    return -sympy.diff(function, symbol)
+    if symengine is not None:
+        jacobian = _get_jacobian_with_symengine(function, free_symbols)
+        if jacobian is not None:
+            return jacobian
+    return sympy.Matrix([function]).jacobian(free_symbols)
 
 
 def get_norm_of_vector(vector: np.ndarray[float | int]) -> float:
     """
-    Function calculates the norm of given vector.
+    Function calculates the norm of given vector. The vector is converted to float64 (without copying, if it already
+    has this type), so the sum of squares is calculated with a single dot product.
 
     :param vector: np.ndarray with float or int values.
 
     :return: Norm of given vector.
     """
-    return sum([abs(element) ** 2 for element in vector]) ** 0.5
+    vector = np.asarray(vector, dtype=np.float64)
+    return float(np.dot(vector, vector) ** 0.5)
 
 
-def get_symbol_value_mapping(symbols_array: List[sympy.Symbol],
-                             values_array: np.ndarray[float | int],
-                             dimension: int) -> Dict[sympy.Symbol, float | int]:
+def _lambdify_points(points: Tuple[Tuple[sympy.Symbol, ...], ...],
+                     expression: sympy.Expr | sympy.Matrix) -> Callable:
     """
-    Function maps the variables of origin function to the values of those variables. The output is a dictionary in
-    which the key is sympy.Symbol and the value is the corresponding value to this variable.
-    E.g. origin function has 2 variables: x_1, x_2. After some calculations, we found out that their values are [0, 1]
-    respectively. SO, the output dictionary will be as follows: {"x_1": 0, "x_2": 1}. This mapping is needed in further
-    calculations.
+    Function lambdifies the expression with common subexpression elimination. Every argument of numeric function is a
+    whole point: sympy generates the unpacking of its coordinates for the exact dimension, so the values are not
+    unpacked into positional arguments at every call. The function is not compiled with Numba: the compilation takes
+    hundreds of milliseconds, while a call becomes faster only by a few microseconds, so it does not pay off for the
+    usual runs.
 
-    :param symbols_array: List, which contains unique sympy.Symbols of variables from origin function.
-    :param values_array: np.ndarray with values of origin function variables.
-    :param dimension: Number of unique function variables.
+    :param points: Tuple of points, every point is a tuple of sympy.Symbols, which are its coordinates.
+    :param expression: Expression or matrix of expressions, which is converted.
+
+    :return: Numeric function, which takes len(points) np.ndarrays.
+    """
+
+    return sympy.lambdify(points, expression, modules="numpy", cse=True)
+
+
+@lru_cache(maxsize=None)
+def get_lambdified_function(function: sympy.core.add.Add,
+                            free_symbols: Tuple[sympy.Symbol, ...]) -> Callable:
+    """
+    This function converts the origin function into a numeric NumPy function. Repeated subexpressions are calculated
+    once (cse). The conversion is expensive, so the result is cached and every next call with the same function and
+    symbols returns already built callable.
+
+    :param function: Function, which was transformed with sympy.sympify().
+    :param free_symbols: Tuple, which contains unique sympy.Symbols of variables from origin function.
+
+    :return: Numeric function, which takes np.ndarray with the values of variables.
+    """
+
+    return _lambdify_points((free_symbols,), function)
+
+
+@lru_cache(maxsize=None)
+def get_vectorized_function(function: sympy.core.add.Add,
+                            free_symbols: Tuple[sympy.Symbol, ...]) -> Callable:
+    """
+    This function converts the origin function into a numeric NumPy function, which can be evaluated for many points at
+    once: every argument is an array with the values of one variable at all the points. The result is cached.
+
+    :param function: Function, which was transformed with sympy.sympify().
+    :param free_symbols: Tuple, which contains unique sympy.Symbols of variables from origin function.
+
+    :return: Vectorized numeric function.
+    """
+
+    return sympy.lambdify(free_symbols, function, modules="numpy", cse=True)
+
+
+def build_gradient(function: sympy.core.add.Add,
+                   free_symbols: List[sympy.Symbol]) -> Callable:
+    """
+    This function builds the numeric gradient of origin function. All the partial derivatives are lambdified together
+    into a single NumPy function with common subexpression elimination, so the parts, which are shared between the
+    derivatives, are calculated only once per call. The gradient is cached for the given function and symbols.
+
+    :param function: Function, which was transformed with sympy.sympify().
+    :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
 
-    :return: Dictionary with {symbol: value} mapping.
+    :return: Numeric gradient, which takes np.ndarray with the values of variables.
     """
 
-    symbol_value_mapping = {}
-    for i in range(dimension):
-        symbol_value_mapping[symbols_array[i]] = values_array[i]
+    return _build_gradient(function, tuple(free_symbols))
 
-    return symbol_value_mapping
+
+@lru_cache(maxsize=None)
+def _build_gradient(function: sympy.core.add.Add,
+                    free_symbols: Tuple[sympy.Symbol, ...]) -> Callable:
+    """
+    Cached implementation of build_gradient(). The symbols are passed as a tuple, so they can be used as a cache key.
+    The gradient is taken from the numeric function, which calculates both the value and the gradient, so only one
+    function is built for them.
+    """
+
+    function_and_gradient = _build_function_and_gradient(function, free_symbols)
+
+    def gradient_function(point: np.ndarray[float]) -> np.ndarray[float]:
+        return function_and_gradient(point)[1]
+
+    return gradient_function
+
+
+def build_function_and_gradient(function: sympy.core.add.Add,
+                                free_symbols: List[sympy.Symbol]) -> Callable:
+    """
+    This function builds a single numeric function, which calculates both the value and the gradient of origin function
+    at a point. They are lambdified together, so the subexpressions, which are shared by the function and its partial
+    derivatives, are calculated once (cse). The function is cached for the given function and symbols.
+
+    :param function: Function, which was transformed with sympy.sympify().
+    :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
+
+    :return: Numeric function, which takes np.ndarray with the values of variables and returns tuple with the value and
+             the gradient.
+    """
+
+    return _build_function_and_gradient(function, tuple(free_symbols))
+
+
+@lru_cache(maxsize=None)
+def _build_function_and_gradient(function: sympy.core.add.Add,
+                                 free_symbols: Tuple[sympy.Symbol, ...]) -> Callable:
+    """
+    Cached implementation of build_function_and_gradient(). The symbols are passed as a tuple, so they can be used as a
+    cache key.
+    """
+
+    return _lambdify_points((free_symbols,), (function, get_jacobian(function, free_symbols)))
 
 
 def get_function_value_at_k_point(function: sympy.core.add.Add,
@@ -72,7 +220,8 @@ def get_function_value_at_k_point(function: sympy.core.add.Add,
                                   x_current: np.ndarray[float | int],
                                   dimension: int) -> int | float:
     """
-    Function calculates value of the origin function with current coordinates.
+    Function calculates value of the origin function with current coordinates. Instead of the symbolic substitution
+    the function is evaluated with its lambdified numeric version, which is built only once for the given function.
 
     :param function: Function, which was transformed with sympy.sympify().
     :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
@@ -82,8 +231,36 @@ def get_function_value_at_k_point(function: sympy.core.add.Add,
     :return: Function value at current coordinates.
     """
 
-    symbol_value_mapping = get_symbol_value_mapping(free_symbols, x_current, dimension)
-    return function.subs(symbol_value_mapping)
+    return get_lambdified_function(function, tuple(free_symbols))(x_current)
+
+
+def get_gradient_value_at_k_point(gradient_function: Callable,
+                                  x_current: np.ndarray[float | int]) -> np.ndarray[float]:
+    """
+    Function calculates value of the numeric gradient at current coordinates.
+
+    :param gradient_function: Numeric gradient, which was built with build_gradient().
+    :param x_current: np.ndarray with values of origin function variables.
+
+    :return: np.ndarray with float64 values of gradient at current coordinates.
+    """
+
+    return np.asarray(gradient_function(x_current), dtype=np.float64).ravel()
+
+
+def get_function_and_gradient_value_at_k_point(function_and_gradient: Callable,
+                                               x_current: np.ndarray[float | int]) -> Tuple[float, np.ndarray[float]]:
+    """
+    Function calculates value of the function and its gradient at current coordinates with one call.
+
+    :param function_and_gradient: Numeric function, which was built with build_function_and_gradient().
+    :param x_current: np.ndarray with values of origin function variables.
+
+    :return: Tuple with function value and np.ndarray with float64 values of gradient at current coordinates.
+    """
+
+    function_value, gradient = function_and_gradient(x_current)
+    return float(function_value), np.asarray(gradient, dtype=np.float64).ravel()
 
 
 def convert_y_values_to_plot(function_values_at_all_points: np.ndarray[float | int],
@@ -91,14 +268,13 @@ def convert_y_values_to_plot(function_values_at_all_points: np.ndarray[float | i
     """
     This function converts Function values at all points as follows: log |f(x) - f(x*)|.
     Where f(x) - is Function value at a certain point and f(x*) - is Function value at known point of minimum.
+    The conversion is made for the whole array at once. A tiny value is added under the logarithm, so the points,
+    where the known minimum is reached exactly, give a finite value instead of -inf.
 
     :param function_values_at_all_points: np.ndarray of Function values.
     :param function_value_at_known_min_point: Function value at known point of minimum.
-    :return:
+    :return: np.ndarray with converted values.
     """
 
-    y = []
-    for i in function_values_at_all_points.astype(np.float64):
-        y.append(np.log10(abs(i - np.array(function_value_at_known_min_point).astype(np.float64))))
-
-    return np.array(y)
+    values = np.asarray(function_values_at_all_points, dtype=np.float64)
+    return np.log10(np.abs(values - float(function_value_at_known_min_point)) + 1e-300)
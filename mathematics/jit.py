@@ -0,0 +1,23 @@
+from typing import Callable
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+def jit(**options) -> Callable:
+    """
+    Decorator compiles the given function with numba.njit. Numba is an optional dependency, so if it is not installed,
+    the function is returned unchanged and works as a regular NumPy function.
+
+    :param options: Keyword arguments, which are passed to numba.njit (e.g. cache=True).
+
+    :return: Decorator, which returns compiled or origin function.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        if numba is None:
+            return function
+        return numba.njit(**options)(function)
+
+    return decorator
@@ -0,0 +1,131 @@
+import numpy as np
+
+from typing import Callable, Dict, Tuple
+
+from mathematics.jit import jit
+
+
+# the kernels are compiled without fastmath, so they are rounded as the NumPy code: the iterations of the methods
+# (especially of the modifications) are very sensitive to the rounding of directions, norms and H
+
+
+@jit(cache=True)
+def gemv(matrix: np.ndarray[np.ndarray[float]],
+         vector: np.ndarray[float],
+         out: np.ndarray[float]) -> np.ndarray[float]:
+    """
+    Function calculates the product of matrix and vector and writes it into the given buffer. For small matrices the
+    NumPy dispatch costs more than the product itself, so the compiled call is used in the iterations.
+
+    :param matrix: Square float64 matrix.
+    :param vector: float64 vector.
+    :param out: float64 buffer for the result. It must not be the same array as vector.
+
+    :return: Buffer with the product.
+    """
+
+    return np.dot(matrix, vector, out)
+
+
+@jit(cache=True)
+def get_step_norms(x_current: np.ndarray[float],
+                   x_previous: np.ndarray[float]) -> Tuple[float, float]:
+    """
+    Function calculates the norm of the step between two points and the norm of the current point in one compiled
+    call. These norms are used by the Second Stopping Criteria.
+
+    :param x_current: float64 vector with current point.
+    :param x_previous: float64 vector with previous point.
+
+    :return: Tuple with norm of x_previous - x_current and norm of x_current.
+    """
+
+    step = x_previous - x_current
+    return np.sqrt(np.dot(step, step)), np.sqrt(np.dot(x_current, x_current))
+
+
+@jit(cache=True)
+def rank_one_update(h_previous: np.ndarray[np.ndarray[float]],
+                    delta_x: np.ndarray[float],
+                    delta_y: np.ndarray[float],
+                    u: np.ndarray[float],
+                    h_next: np.ndarray[np.ndarray[float]]) -> bool:
+    """
+    Function calculates u = delta_x - H_k-1 * delta_y and writes H_k-1 + u * u^T / (u^T * delta_y) into the given
+    buffer in one compiled call. The update is written element by element, so no temporary matrix is made.
+
+    :param h_previous: Square float64 matrix H_k-1.
+    :param delta_x: float64 vector with difference of points.
+    :param delta_y: float64 vector with difference of gradients.
+    :param u: float64 buffer for the bracketed expression u.
+    :param h_next: float64 buffer for the new matrix. It may be the same array as h_previous.
+
+    :return: False, if the denominator is zero and h_next is not written, otherwise True.
+    """
+
+    np.dot(h_previous, delta_y, u)
+    np.subtract(delta_x, u, u)
+    denominator = np.dot(u, delta_y)
+    if denominator == 0:
+        return False
+
+    # the element of H_k-1 is read before the same element of h_next is written, so the buffers may be the same
+    dimension = u.shape[0]
+    for i in range(dimension):
+        for j in range(dimension):
+            h_next[i, j] = h_previous[i, j] + u[i] * u[j] / denominator
+    return True
+
+
+# modes of descent direction kernel, which correspond to the base method and its modifications
+BASE_MODE = 0
+FIRST_MODIFICATION_MODE = 1
+SECOND_MODIFICATION_MODE = 2
+THIRD_MODIFICATION_MODE = 3
+
+
+def _make_s_k_kernel(mode: int) -> Callable:
+    """
+    Function creates the descent direction kernel, specialized for the given mode. The mode is a constant of the
+    closure, so the JIT compiler removes the branches, which are not used by this mode.
+    Directions of descent are as follows (g_k - gradient at current point):
+    base method: s_k = -g_k + beta_k * s_k-1;
+    first modification: s_k = -g_k + beta_k * H_k-1 * s_k-1;
+    second modification: s_k = -H_k * g_k + beta_k * s_k-1;
+    third modification: s_k = -H_k * g_k + beta_k * H_k-1 * s_k-1.
+
+    :param mode: One of BASE_MODE, FIRST_MODIFICATION_MODE, SECOND_MODIFICATION_MODE, THIRD_MODIFICATION_MODE.
+
+    :return: Kernel, which takes antigradient at current point, beta, previous direction of descent, H_k, H_k-1 and
+             float64 buffer for the result, which must not be the same array as any of the vectors. Matrices, which are
+             not used by the mode, may be empty.
+    """
+
+    @jit(cache=True)
+    def get_s_k_kernel(anti_gradient: np.ndarray[float],
+                       beta_current: float | int,
+                       s_previous: np.ndarray[float],
+                       h_current: np.ndarray[np.ndarray[float]],
+                       h_previous: np.ndarray[np.ndarray[float]],
+                       out: np.ndarray[float]) -> np.ndarray[float]:
+        if mode == BASE_MODE:
+            np.multiply(s_previous, beta_current, out)
+            out += anti_gradient
+        elif mode == FIRST_MODIFICATION_MODE:
+            np.dot(h_previous, s_previous, out)
+            out *= beta_current
+            out += anti_gradient
+        elif mode == SECOND_MODIFICATION_MODE:
+            np.dot(h_current, anti_gradient, out)
+            out += beta_current * s_previous
+        else:
+            np.dot(h_current, anti_gradient, out)
+            out += beta_current * (h_previous @ s_previous)
+        return out
+
+    return get_s_k_kernel
+
+
+S_K_KERNELS: Dict[int, Callable] = {mode: _make_s_k_kernel(mode)
+                                    for mode in (BASE_MODE, FIRST_MODIFICATION_MODE, SECOND_MODIFICATION_MODE,
+                                                 THIRD_MODIFICATION_MODE)}
@@ -1,12 +1,33 @@
 import numpy as np
 import sympy
-from sympy import symbols, simplify, lambdify
-from scipy.optimize import minimize_scalar
-
-from typing import List
-
-from mathematics.general import (get_symbol_value_mapping, get_derivative, get_norm_of_vector,
-                                 get_function_value_at_k_point)
+from scipy.optimize import minimize_scalar, brentq
+from scipy.linalg.blas import dger
+
+from typing import List, Callable
+
+from mathematics.general import (get_function_value_at_k_point, get_gradient_value_at_k_point, get_lambdified_function,
+                                 get_vectorized_function, build_gradient)
+from mathematics.kernels import (gemv, rank_one_update, S_K_KERNELS, BASE_MODE, FIRST_MODIFICATION_MODE,
+                                SECOND_MODIFICATION_MODE)
+
+
+# maximum number of doublings of alpha, while the interval with the minimum of single factor function is searched
+SINGLE_FACTOR_BRACKET_EXPANSIONS = 60
+# number of alpha candidates (1, 1/2, 1/4, ...), which are checked by the doubling method
+DOUBLING_CANDIDATES_NUMBER = 64
+# alpha candidates are exact powers of two, so they are built once by setting the exponent
+DOUBLING_ALPHAS = np.ldexp(1.0, -np.arange(DOUBLING_CANDIDATES_NUMBER))
+# constant c of Armijo condition f(x + alpha * s) <= f(x) + c * alpha * (grad f(x), s), the candidates of alpha are
+# the same as in the doubling method
+ARMIJO_SUFFICIENT_DECREASE = 1e-4
+# number of equally spaced alpha candidates in [0, gamma], which are checked by the grid search at once
+GRID_SEARCH_CANDIDATES_NUMBER = 32
+# maximum number of times the grid is stretched or shrunk, while the minimum lies at its border
+GRID_SEARCH_RESCALES_NUMBER = 20
+# placeholder for the matrices H, which are not used by the method, so all direction kernels share one signature
+_NO_MATRIX = np.empty((0, 0), dtype=np.float64)
+# dimension, starting from which matrix H is updated with BLAS routine
+BLAS_RANK_ONE_UPDATE_DIMENSION = 64
 
 
 def get_alpha_k_single_factor_minimization(function: sympy.core.add.Add,
@@ -16,6 +37,11 @@ def get_alpha_k_single_factor_minimization(function: sympy.core.add.Add,
                                            dimension: int) -> float | int:
     """
     The function performs single factor minimization of the original function with respect to the variable alpha.
+    The minimization is numeric and uses the lambdified function and gradient along the direction of descent:
+    phi(alpha) = f(x_current + alpha * s_current) and phi'(alpha) = s_current * grad f(x_current + alpha * s_current).
+    If s_current is a descent direction (phi'(0) < 0), the interval, where phi' changes its sign, is found by doubling
+    alpha, and the minimum is found as the root of phi' with Brent's method. Otherwise, or if the sign is not changed
+    after SINGLE_FACTOR_BRACKET_EXPANSIONS doublings, Brent's minimization of phi is used.
 
     :param function: Function, which was transformed with sympy.sympify().
     :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
@@ -26,17 +52,23 @@ def get_alpha_k_single_factor_minimization(function: sympy.core.add.Add,
     :return: Value of alpha variable.
     """
 
-    alpha = symbols("alpha")
+    numeric_function = get_lambdified_function(function, tuple(free_symbols))
+    gradient_function = build_gradient(function, free_symbols)
+
+    def phi(alpha: float) -> float:
+        return numeric_function(x_current + alpha * s_current)
 
-    alpha_vector = {}
-    for i in range(dimension):
-        alpha_vector[free_symbols[i]] = x_current[i] + alpha * s_current[i]
+    def phi_prime(alpha: float) -> float:
+        return float(s_current @ get_gradient_value_at_k_point(gradient_function, x_current + alpha * s_current))
 
-    equation_with_alpa_substitution = simplify(function.subs(alpha_vector))
+    if phi_prime(0.0) < 0:
+        alpha_low, alpha_high = 0.0, 1.0
+        for _ in range(SINGLE_FACTOR_BRACKET_EXPANSIONS):
+            if phi_prime(alpha_high) > 0:
+                return brentq(phi_prime, alpha_low, alpha_high)
+            alpha_low, alpha_high = alpha_high, 2 * alpha_high
 
-    lam_f = lambdify(alpha, equation_with_alpa_substitution)
-    alpha_k = minimize_scalar(lam_f)
-    return alpha_k.x
+    return minimize_scalar(phi, method="brent").x
 
 
 def get_alpha_k_doubling_method(function: sympy.core.add.Add,
@@ -50,6 +82,84 @@ def get_alpha_k_doubling_method(function: sympy.core.add.Add,
     current point, then alpha parameter is correct and it returns it.
     If function value at x_next point is greater than function value at current point, we divide alpha value by 2 and
     repeat comparison.
+    Instead of the sequential halving, all the candidates 1, 1/2, 1/4, ... are evaluated in one vectorized call and
+    the largest suitable one is returned. If none of DOUBLING_CANDIDATES_NUMBER candidates decreases the function, the
+    step is not made and 0 is returned.
+
+    :param function: Function, which was transformed with sympy.sympify().
+    :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
+    :param x_current: np.ndarray with values of origin function variables at current point.
+    :param s_current: np.ndarray with values of descent direction vector.
+    :param dimension: Number of unique function variables.
+
+    :return: Value of alpha variable.
+    """
+
+    x_candidates = np.outer(DOUBLING_ALPHAS, s_current)
+    x_candidates += x_current
+
+    vectorized_function = get_vectorized_function(function, tuple(free_symbols))
+    function_values = np.broadcast_to(vectorized_function(*x_candidates.T), DOUBLING_ALPHAS.shape)
+
+    is_suitable = function_values <= get_function_value_at_k_point(function, free_symbols, x_current, dimension)
+    if not is_suitable.any():
+        return 0.0
+
+    return DOUBLING_ALPHAS[np.argmax(is_suitable)]
+
+
+def get_alpha_k_armijo_backtracking(function: sympy.core.add.Add,
+                                    free_symbols: List[sympy.Symbol],
+                                    x_current: np.ndarray[float | int],
+                                    s_current: np.ndarray[float | int],
+                                    dimension: int) -> float | int:
+    """
+    The function calculates alpha with backtracking line search. Alpha is suitable, if it meets Armijo condition of
+    sufficient decrease: f(x_current + alpha * s_current) <= f(x_current) + c * alpha * (grad f(x_current), s_current),
+    where c is ARMIJO_SUFFICIENT_DECREASE. As in the doubling method, all the candidates 1, 1/2, 1/4, ... are evaluated
+    in one vectorized call instead of the sequential halving and the largest suitable one is returned. If s_current is
+    not a direction of descent, only the decrease of the function is required. If none of the candidates is suitable,
+    the step is not made and 0 is returned.
+
+    :param function: Function, which was transformed with sympy.sympify().
+    :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
+    :param x_current: np.ndarray with values of origin function variables at current point.
+    :param s_current: np.ndarray with values of descent direction vector.
+    :param dimension: Number of unique function variables.
+
+    :return: Value of alpha variable.
+    """
+
+    x_candidates = np.outer(DOUBLING_ALPHAS, s_current)
+    x_candidates += x_current
+
+    vectorized_function = get_vectorized_function(function, tuple(free_symbols))
+    function_values = np.broadcast_to(vectorized_function(*x_candidates.T), DOUBLING_ALPHAS.shape)
+
+    gradient_function = build_gradient(function, free_symbols)
+    slope = min(float(s_current @ get_gradient_value_at_k_point(gradient_function, x_current)), 0.0)
+    thresholds = DOUBLING_ALPHAS * (ARMIJO_SUFFICIENT_DECREASE * slope)
+    thresholds += get_function_value_at_k_point(function, free_symbols, x_current, dimension)
+
+    is_suitable = function_values <= thresholds
+    if not is_suitable.any():
+        return 0.0
+
+    return DOUBLING_ALPHAS[np.argmax(is_suitable)]
+
+
+def get_alpha_k_grid_search(function: sympy.core.add.Add,
+                            free_symbols: List[sympy.Symbol],
+                            x_current: np.ndarray[float | int],
+                            s_current: np.ndarray[float | int],
+                            dimension: int) -> float | int:
+    """
+    The function calculates alpha with the grid search. The function is evaluated at GRID_SEARCH_CANDIDATES_NUMBER
+    equally spaced alpha in [0, gamma] in one vectorized call, and the best alpha is refined with the vertex of the
+    parabola through it and its neighbours. Starting gamma is 1. If the best alpha is the last one, the grid is
+    stretched, if it is 0, the grid is shrunk to its first step, until the minimum lies inside the grid or
+    GRID_SEARCH_RESCALES_NUMBER attempts are made. If the function is not decreased, the step is not made and 0 is
+    returned.
 
     :param function: Function, which was transformed with sympy.sympify().
     :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
@@ -59,46 +169,99 @@ def get_alpha_k_doubling_method(function: sympy.core.add.Add,
 
     :return: Value of alpha variable.
     """
-    alpha = 1
-    x_next = get_x_next(x_current, alpha, s_current)
 
-    while (get_function_value_at_k_point(function, free_symbols, x_next, dimension) >
-           get_function_value_at_k_point(function, free_symbols, x_current, dimension)):
-        alpha /= 2
-        x_next = get_x_next(x_current, alpha, s_current)
+    vectorized_function = get_vectorized_function(function, tuple(free_symbols))
+    numeric_function = get_lambdified_function(function, tuple(free_symbols))
+
+    gamma = 1.0
+    for _ in range(GRID_SEARCH_RESCALES_NUMBER):
+        alphas = np.linspace(0.0, gamma, GRID_SEARCH_CANDIDATES_NUMBER)
+        x_candidates = np.outer(alphas, s_current)
+        x_candidates += x_current
+        function_values = np.broadcast_to(vectorized_function(*x_candidates.T), alphas.shape)
+
+        best_index = int(np.argmin(function_values))
+        if best_index == GRID_SEARCH_CANDIDATES_NUMBER - 1:
+            gamma *= GRID_SEARCH_CANDIDATES_NUMBER - 1
+        elif best_index == 0:
+            gamma = alphas[1]
+        else:
+            break
+    else:
+        return alphas[best_index]
+
+    # vertex of the parabola through three equally spaced points, the middle one is the lowest
+    previous_value, best_value, next_value = function_values[best_index - 1:best_index + 2]
+    curvature = previous_value - 2 * best_value + next_value
+    if curvature <= 0:
+        return alphas[best_index]
 
-    return alpha
+    alpha_vertex = alphas[best_index] + alphas[1] * (previous_value - next_value) / (2 * curvature)
+    if numeric_function(x_current + alpha_vertex * s_current) <= best_value:
+        return alpha_vertex
+    return alphas[best_index]
+
+
+def get_alpha_0(function: sympy.core.add.Add,
+                free_symbols: List[sympy.Symbol],
+                x_0: np.ndarray[float | int],
+                dimension: int,
+                alpha_k_calculating_method: Callable) -> float | int:
+    """
+    Function calculates alpha at the starting point. All the methods make the first step along the antigradient
+    (s_0 = -g_0), so, if they are run from the same point, this alpha is calculated once and given to all of them.
+
+    :param function: Function, which was transformed with sympy.sympify().
+    :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
+    :param x_0: np.ndarray with starting coordinates.
+    :param dimension: Number of unique function variables.
+    :param alpha_k_calculating_method: One of the alpha calculating methods above.
+
+    :return: Value of alpha at the starting point.
+    """
+
+    anti_gradient = -get_gradient_value_at_k_point(build_gradient(function, free_symbols), x_0)
+    return alpha_k_calculating_method(function=function,
+                                      free_symbols=free_symbols,
+                                      x_current=x_0,
+                                      s_current=anti_gradient,
+                                      dimension=dimension)
 
 
 def get_x_next(x_current: np.ndarray[float | int],
                alpha_current: float | int,
-               s_current: np.ndarray[float | int]) -> np.ndarray[float | int]:
+               s_current: np.ndarray[float | int],
+               out: np.ndarray[float] | None = None) -> np.ndarray[float | int]:
     """
     The function calculates the next point of approach to the minimum.
 
     :param x_current: np.ndarray with values of origin function variables at current point.
     :param alpha_current: Value of alpha variable.
     :param s_current: np.ndarray with values of descent direction vector at current point.
+    :param out: Optional float64 buffer, where the result is written without allocating a new array. It must not be
+                the same array as x_current or s_current.
 
     :return: The next point coordinates.
     """
 
-    return x_current + s_current * alpha_current
+    if out is None:
+        return x_current + s_current * alpha_current
+
+    np.multiply(s_current, alpha_current, out=out)
+    return np.add(x_current, out, out=out)
 
 
-def get_beta_k(function: sympy.core.add.Add,
-               free_symbols: List[sympy.Symbol],
-               x_current: np.ndarray[float | int],
-               x_previous: np.ndarray[float | int],
+def get_beta_k(current_gradient_squared_norm: float | int,
+               previous_gradient_squared_norm: float | int,
                iteration_number: int,
                dimension: int) -> int | float:
     """
     The function calculates the descent step size using the update procedure (see more information if README).
+    The squared norm of gradient at current point becomes the previous one at the next iteration, so the methods
+    keep it between iterations and the gradient is calculated only once per iteration.
 
-    :param function: Function, which was transformed with sympy.sympify().
-    :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
-    :param x_current: np.ndarray with values of origin function variables at current point.
-    :param x_previous: np.ndarray with values of origin function variables at previous point.
+    :param current_gradient_squared_norm: Squared norm of gradient at current point.
+    :param previous_gradient_squared_norm: Squared norm of gradient at previous point.
     :param iteration_number: Number of iterations.
     :param dimension: Number of unique function variables.
 
@@ -109,103 +272,152 @@ def get_beta_k(function: sympy.core.add.Add,
         return 0
 
     else:
-        x_current_symbol_value_mapping = get_symbol_value_mapping(free_symbols, x_current, dimension)
-        x_previous_symbol_value_mapping = get_symbol_value_mapping(free_symbols, x_previous, dimension)
+        return current_gradient_squared_norm / previous_gradient_squared_norm
 
-        current_function_derivative_with_substitution = []
-        previous_function_derivative_with_substitution = []
-        for i in range(dimension):
-            current_function_derivative_with_substitution.append(get_derivative(function, free_symbols[i]).
-                                                                 subs(x_current_symbol_value_mapping))
 
-            previous_function_derivative_with_substitution.append(get_derivative(function, free_symbols[i])
-                                                                  .subs(x_previous_symbol_value_mapping))
+def get_s_k(anti_gradient: np.ndarray[float],
+            beta_current: float | int,
+            s_previous: np.ndarray[float | int],
+            iteration: int,
+            h_current: np.ndarray[np.ndarray[float | int]] | None = None,
+            h_previous: np.ndarray[np.ndarray[float | int]] | None = None,
+            out: np.ndarray[float] | None = None) -> np.ndarray[float | int]:
+    """
+    The function calculates current direction of descent (see more information in README). It is shared by the base
+    method and all the modifications, which differ only by the special matrices H they pass:
+    no matrices - base method, h_previous - first modification, h_current - second modification, both matrices - third
+    modification.
+
+    :param anti_gradient: np.ndarray with values of antigradient at current point. The methods already know the
+                          gradient at current point, so it is calculated only once per iteration.
+    :param beta_current: Value of descent step size.
+    :param s_previous: np.ndarray with values of descent direction vector at previous point.
+    :param iteration: Number of current iteration.
+    :param h_current: Special matrix H, calculated at current iteration.
+    :param h_previous: Special matrix H, calculated at previous iteration.
+    :param out: Optional float64 buffer, where the result is written without allocating a new array. It must not be
+                the same array as anti_gradient or s_previous.
+
+    :return: np.ndarray with values of descent direction vector.
+    """
 
-        return (get_norm_of_vector(np.array(current_function_derivative_with_substitution)) ** 2
-                / get_norm_of_vector(np.array(previous_function_derivative_with_substitution)) ** 2)
+    if iteration == 0:
+        if out is None:
+            return anti_gradient
+        np.copyto(out, anti_gradient)
+        return out
 
+    # mode of the kernel is defined by the matrices, which are used: H_k-1 adds 1, H_k adds 2
+    mode = BASE_MODE
+    if h_previous is None:
+        h_previous = _NO_MATRIX
+    else:
+        mode += FIRST_MODIFICATION_MODE
+    if h_current is None:
+        h_current = _NO_MATRIX
+    else:
+        mode += SECOND_MODIFICATION_MODE
 
-def get_delta_x(x_next: np.ndarray[float | int],
-                x_current: np.ndarray[float | int]) -> np.ndarray[float | int]:
-    """
-    The function calculates the difference of coordinates of points x. For more information see README.
+    if out is None:
+        out = np.empty_like(anti_gradient, dtype=np.float64)
+    return S_K_KERNELS[mode](anti_gradient, beta_current, s_previous, h_current, h_previous, out)
 
-    :param x_next: np.ndarray with values of origin function variables at next point.
-    :param x_current: np.ndarray with values of origin function variables at current point.
 
-    :return: np.ndarray with coordinate difference.
-    """
+class CGWorkspace:
+    def __init__(self,
+                 dimension: int):
+        """
+        Preallocated arrays, which are used by get_h_k() at every iteration, so the update of matrix H does not
+        allocate new arrays. One workspace is created for one run of the minimization method.
 
-    return np.subtract(x_next, x_current)
+        :param dimension: Number of unique function variables.
+        :param delta_x: Buffer for the difference of coordinates of points x.
+        :param delta_y: Buffer for the difference of gradients at points x.
+        :param h_delta_y: Buffer for the product H * delta Y.
+        :param u: Buffer for the bracketed expression delta X - H * delta Y.
+        """
+        self.delta_x = np.empty(dimension, dtype=np.float64)
+        self.delta_y = np.empty(dimension, dtype=np.float64)
+        self.h_delta_y = np.empty(dimension, dtype=np.float64)
+        self.u = np.empty(dimension, dtype=np.float64)
 
 
-def get_delta_y(function: sympy.core.add.Add,
-                free_symbols: List[sympy.Symbol],
-                x_next: np.ndarray[float | int],
+def get_delta_x(x_next: np.ndarray[float | int],
                 x_current: np.ndarray[float | int],
-                dimension: int) -> np.ndarray[float | int]:
+                out: np.ndarray[float] | None = None) -> np.ndarray[float | int]:
     """
-    Function calculates the special parameter delta Y. For more information see README.
+    The function calculates the difference of coordinates of points x. For more information see README.
 
-    :param function: Function, which was transformed with sympy.sympify().
-    :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
     :param x_next: np.ndarray with values of origin function variables at next point.
     :param x_current: np.ndarray with values of origin function variables at current point.
-    :param dimension: Number of unique function variables.
+    :param out: Optional float64 buffer, where the result is written without allocating a new array.
 
-    :return: np.ndarray with values of delta Y.
+    :return: np.ndarray with coordinate difference.
     """
 
-    next_symbol_value_mapping = get_symbol_value_mapping(free_symbols, x_next, dimension)
-    current_symbol_value_mapping = get_symbol_value_mapping(free_symbols, x_current, dimension)
-
-    derivative_list = []
-    for i in range(dimension):
-        derivative_list.append(get_derivative(function, free_symbols[i]))
-
-    next_derivative_w_substitution = []
-    current_derivative_w_substitution = []
-    for derivative in derivative_list:
-        next_derivative_w_substitution.append(derivative.subs(next_symbol_value_mapping))
-        current_derivative_w_substitution.append(derivative.subs(current_symbol_value_mapping))
+    if out is None:
+        return x_next - x_current
 
-    return (np.array(next_derivative_w_substitution).astype(np.float64)
-            - np.array(current_derivative_w_substitution).astype(np.float64))
+    return np.subtract(x_next, x_current, out=out)
 
 
-def get_h_k(function: sympy.core.add.Add,
-            free_symbols: List[sympy.Symbol],
-            x_next: np.ndarray[float | int],
+def get_h_k(x_next: np.ndarray[float | int],
             x_current: np.ndarray[float | int],
             dimension: int,
-            h_previous: np.ndarray[np.ndarray[float | int]]): #-> np.ndarray[np.ndarray[float | int]]:
+            h_previous: np.ndarray[np.ndarray[float | int]],
+            delta_y: np.ndarray[float],
+            workspace: CGWorkspace | None = None,
+            out: np.ndarray[np.ndarray[float]] | None = None) -> np.ndarray[np.ndarray[float | int]]:
     """
     Function calculates a special matrix H, which is used in modifications. For more information see README.
+    If out is not given, the matrix is updated in place, so the caller must keep h_previous in another buffer, if it
+    is still needed.
 
-    :param function: Function, which was transformed with sympy.sympify().
-    :param free_symbols: List, which contains unique sympy.Symbols of variables from origin function.
     :param x_next: np.ndarray with values of origin function variables at next point.
     :param x_current: np.ndarray with values of origin function variables at current point.
     :param dimension: Number of unique function variables.
-    :param h_previous: Matrix H, which was calculated at previous iteration.
+    :param h_previous: Matrix H, which was calculated at previous iteration (C-contiguous float64 array).
+    :param delta_y: float64 vector with difference of gradients at x_next and x_current (the methods already know the
+                    gradients at both points).
+    :param workspace: Optional preallocated arrays for intermediate results. If it is not given, a temporary one is
+                      created.
+    :param out: Optional C-contiguous float64 buffer, where the new matrix is written, so h_previous is not changed. It
+                must not be the same array as h_previous.
 
     :return: Special matrix H.
     """
 
-    delta_x = get_delta_x(x_next=x_next,
-                          x_current=x_current)
+    if workspace is None:
+        workspace = CGWorkspace(dimension)
 
-    delta_y = get_delta_y(function=function,
-                          free_symbols=free_symbols,
-                          x_next=x_next,
+    delta_x = get_delta_x(x_next=x_next,
                           x_current=x_current,
-                          dimension=dimension)
-
-    bracketed_expression = np.subtract(delta_x, np.dot(h_previous, delta_y))
-    denominator = np.dot(bracketed_expression, delta_y)
-    if denominator == 0:
-        return np.eye(dimension)
+                          out=workspace.delta_x)
+
+    h_next = h_previous if out is None else out
+
+    # rank-one update H + u * u^T / (u^T * delta_y) is applied in place. Small matrices are updated by one compiled
+    # kernel, big ones with BLAS (transposed view of C-ordered matrix is Fortran-ordered, so BLAS writes directly into
+    # it, the update itself is symmetric)
+    if dimension > BLAS_RANK_ONE_UPDATE_DIMENSION:
+        bracketed_expression = np.subtract(delta_x, gemv(h_previous, delta_y, workspace.h_delta_y), out=workspace.u)
+        denominator = bracketed_expression @ delta_y
+        is_updated = denominator != 0
+        if is_updated:
+            if out is not None:
+                np.copyto(h_next, h_previous)
+            h_next_transposed = h_next.T
+            updated = dger(1.0 / denominator, bracketed_expression, bracketed_expression, a=h_next_transposed,
+                           overwrite_a=1)
+            # f2py writes into the matrix only if its transposed view is Fortran-ordered, otherwise the update is
+            # returned as a new array
+            if updated is not h_next_transposed:
+                h_next[...] = updated.T
     else:
-        expression_right_side = np.divide(np.dot(bracketed_expression.T, bracketed_expression), denominator)
+        is_updated = rank_one_update(h_previous, delta_x, delta_y, workspace.u, h_next)
+
+    if not is_updated:
+        h_next.fill(0.0)
+        np.fill_diagonal(h_next, 1.0)
 
-        return np.add(h_previous, expression_right_side)
+    return h_next
@@ -1,41 +1,82 @@
 from abc import ABC, abstractmethod
 
 import numpy as np
-from sympy import sympify
+from sympy import Expr
 
 import re
+import time
 import datetime
+from functools import lru_cache
 from typing import List, Callable
 
+from mathematics.general import get_lambdified_function, build_gradient, build_function_and_gradient, parse_function
+
+
+# a word of the class name in CamelCase style
+_CAMEL_CASE_WORD = re.compile(r"[A-Z][^A-Z]*")
+
+
+@lru_cache(maxsize=None)
+def _split_camel_case(name: str) -> str:
+    """
+    Function splits the name in CamelCase style into words, separated by spaces. The result is cached, because the
+    names of classes do not change.
+
+    :param name: Name in CamelCase style.
+
+    :return: String with words, separated by spaces.
+    """
+
+    return " ".join(_CAMEL_CASE_WORD.findall(name))
+
 
 class ABCMinimisationMethod(ABC):
     def __init__(self,
-                 function: str,
+                 function: str | Expr,
                  x_0: List[int | float],
                  min_point: List[int | float],
                  accuracy: int,
                  iteration_threshold: int,
-                 alpha_k_calculating_method: Callable):
+                 alpha_k_calculating_method: Callable,
+                 alpha_0: float | None = None):
         """
         All the minimization methods shares the same input data.
 
-        :param function: Function in a string format.
+        :param function: Function in a string format or already parsed sympy expression.
         :param x_0: List with starting coordinates.
         :param min_point: List with known minimum coordinates.
         :param accuracy: Given accuracy, with which we need to find the points of minimum of the function.
         :param iteration_threshold: Number of iterations after which the minimization process terminates.
         :param alpha_k_calculating_method: Function reference for alpha calculation.
+        :param alpha_0: Optional alpha at x_0, which was already calculated with get_alpha_0(). If it is not given, it
+                        is calculated at the first iteration.
         :param _dimension: Number of unique variables in the function.
         :param _free_symbols: List of unique sympy.Symbols, which are the function variables.
+        :param _f: Numeric function, which takes np.ndarray with the values of variables.
+        :param _grad: Numeric gradient of the function.
+        :param _f_and_grad: Numeric function, which calculates the value and the gradient of the function with one call.
+        :param known_min_value: Function value at known minimum point.
+        :param _target_min_point_str: Known minimum point, formatted for output.
+        :param x_history: np.ndarray with the points of the last run of the method, one row per iteration.
         """
-        self.function = sympify(function)
-        self.x_0 = np.array(x_0)
-        self.min_point = np.array(min_point)
+        self.function = parse_function(function)
+        # points are converted to float64 once, so all numeric helpers get the arrays of the same type
+        self.x_0 = np.ascontiguousarray(x_0, dtype=np.float64)
+        self.min_point = np.ascontiguousarray(min_point, dtype=np.float64)
         self.accuracy = 10 ** accuracy
         self.iteration_threshold = iteration_threshold
         self.alpha_k_calculating_method = alpha_k_calculating_method
+        self.alpha_0 = alpha_0
         self.dimension = len(x_0)
         self.free_symbols = sorted(self.function.free_symbols, key=lambda sym: sym.name)
+        # numeric function and gradient are built once, so the iterations do not touch sympy
+        self._f = get_lambdified_function(self.function, tuple(self.free_symbols))
+        self._grad = build_gradient(self.function, self.free_symbols)
+        self._f_and_grad = build_function_and_gradient(self.function, self.free_symbols)
+        self.x_history = np.empty((0, self.dimension), dtype=np.float64)
+        # known minimum does not change between the runs, so its value and representation are prepared once
+        self.known_min_value = self._f(self.min_point)
+        self._target_min_point_str = "(" + ", ".join(self.min_point.astype(str)) + ")"
 
     def __str__(self):
         """
@@ -46,7 +87,7 @@ class ABCMinimisationMethod(ABC):
 
         :return: String with a name of a class, separated by spaces.
         """
-        return " ".join(re.findall('[A-Z][^A-Z]*', type(self).__name__))
+        return _split_camel_case(type(self).__name__)
 
     @staticmethod
     def euclidean_distance(p: np.ndarray[float | int],
@@ -60,10 +101,20 @@ class ABCMinimisationMethod(ABC):
         :return: string with Euclidian Distance.
         """
 
-        p = np.array(p).astype(np.float32)
-        q = np.array(q).astype(np.float32)
+        return f"{np.linalg.norm(np.asarray(p, dtype=np.float64) - np.asarray(q, dtype=np.float64)):.2e}"
+
+    @staticmethod
+    def get_elapsed_time(start_time: int) -> datetime.timedelta:
+        """
+        Method calculates the time, which passed since the start of minimization. The monotonic clock is used, so the
+        result does not depend on the changes of the system time.
+
+        :param start_time: Value of time.perf_counter_ns() at the start of minimization.
+
+        :return: Taken time as datetime.timedelta.
+        """
 
-        return f"{np.sqrt(np.sum((p - q) ** 2)):.2e}"
+        return datetime.timedelta(microseconds=(time.perf_counter_ns() - start_time) / 1000)
 
     @staticmethod
     def reformat_min_coordinates_output(min_point: np.ndarray[float | int],
@@ -72,12 +123,15 @@ class ABCMinimisationMethod(ABC):
         Method changes minimum point coordinates, so they could be displayed in a better way.
 
         :param min_point: numpy array with minimum point coordinates.
-        :param precision: number of numbers to be displayed after decimal point.
+        :param precision: number of numbers to be displayed after decimal point in scientific notation, so the
+                          coordinates are displayed with precision + 1 significant digits.
 
         :return: string with reformatted coordinates.
         """
 
-        return "(" + ", ".join([f"{i:.{precision + 1}}" for i in min_point]) + ")"
+        # coordinates are formatted by NumPy at once with significant digits, so the values near zero are not rounded
+        # to zero
+        return "(" + ", ".join(np.char.mod(f"%.{precision + 1}g", min_point).tolist()) + ")"
 
     def print_result_info(self,
                           min_point: np.ndarray[float | int],
@@ -102,31 +156,32 @@ class ABCMinimisationMethod(ABC):
         delimiter_str = "=" * 70 + "\n"
         method_name_str = f"Method name: {self}\n"
         resulting_min_str = f"The resulting point of minimum: {self.reformat_min_coordinates_output(min_point, 8)}\n"
-        target_min_str = f"Target point of minimum: {'(' + ', '.join(self.min_point.astype(str)) + ')'}\n"
+        target_min_str = f"Target point of minimum: {self._target_min_point_str}\n"
         iterations_str = f"Number of Iterations: {iteration_number}\n"
         time_str = f"Execution time: {time}\n"
         reached_min_func_value_str = f"Function value at the reached minimum point: " \
                                      f"{float(reached_min_func_value):.2e}\n"
         started_func_value_str = f"Function value at starting point: {started_func_value}\n"
         known_min_function_value_str = f"Function value at known minimum point (Phi*): {known_min_function_value}\n"
-        euclidian_distance_str = "Euclidian distance between Target and Resulting minimum points (Delta X): " \
-                                 + self.euclidean_distance(self.min_point, min_point) + "\n"
+        euclidian_distance_str = f"Euclidian distance between Target and Resulting minimum points (Delta X): " \
+                                 f"{self.euclidean_distance(self.min_point, min_point)}\n"
         delta_phi_str = f"Difference between function values at known and reached minimum points (Delta Phi): " \
                         f"{abs(float(known_min_function_value) - float(reached_min_func_value)):.2e}\n"
 
-        print(additional_message
-              + delimiter_str
-              + method_name_str
-              + resulting_min_str
-              + target_min_str
-              + euclidian_distance_str
-              + iterations_str
-              + time_str
-              + started_func_value_str
-              + known_min_function_value_str
-              + reached_min_func_value_str
-              + delta_phi_str
-              + delimiter_str)
+        # the parts are joined at once, without intermediate strings
+        print("".join((additional_message,
+                       delimiter_str,
+                       method_name_str,
+                       resulting_min_str,
+                       target_min_str,
+                       euclidian_distance_str,
+                       iterations_str,
+                       time_str,
+                       started_func_value_str,
+                       known_min_function_value_str,
+                       reached_min_func_value_str,
+                       delta_phi_str,
+                       delimiter_str)))
 
     @abstractmethod
     def run_method(self):
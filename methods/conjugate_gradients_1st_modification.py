@@ -1,72 +1,38 @@
 import numpy as np
+from sympy import Expr
 
-from datetime import datetime
+import time
 from typing import List, Callable, Tuple
 
 from methods.abc_minimization_method import ABCMinimisationMethod
-from mathematics.general import get_function_value_at_k_point, get_symbol_value_mapping, get_anti_derivative
-from mathematics.modification import get_beta_k, get_x_next, get_h_k
+from mathematics.general import get_gradient_value_at_k_point, get_function_and_gradient_value_at_k_point
+from mathematics.modification import get_beta_k, get_s_k, get_x_next, get_h_k, CGWorkspace
 from stopping_criteria.conjugate_stopping_criteria.conjugate_stopping_criteria import check_all_criteria
 
 
 class ConjugateGradientsFirstModification(ABCMinimisationMethod):
     def __init__(self,
-                 function: str,
+                 function: str | Expr,
                  x_0: List[int | float],
                  min_point: List[int | float],
                  accuracy: int,
                  iteration_threshold: int,
-                 alpha_k_calculating_method: Callable):
+                 alpha_k_calculating_method: Callable,
+                 alpha_0: float | None = None):
         """
         All the minimization methods shares the same input data.
 
-        :param function: Function in a string format.
+        :param function: Function in a string format or already parsed sympy expression.
         :param x_0: List with starting coordinates.
         :param min_point: List with known minimum coordinates.
         :param accuracy: Given accuracy, with which we need to find the points of minimum of the function.
         :param iteration_threshold: Number of iterations after which the minimization process terminates.
         :param alpha_k_calculating_method: Function reference for alpha calculation.
+        :param alpha_0: Optional alpha at x_0, which was already calculated with get_alpha_0().
         :param dimension: Number of unique variables in the function.
         :param free_symbols: List of unique sympy.Symbols, which are the function variables.
         """
-        super().__init__(function, x_0, min_point, accuracy, iteration_threshold, alpha_k_calculating_method)
-
-    def _get_s_k_first_modification(self,
-                                    x_current: np.ndarray[float | int],
-                                    beta_current: float | int,
-                                    s_previous: np.ndarray[float | int],
-                                    h_previous: np.ndarray[np.ndarray[float | int]],
-                                    iteration: int) -> np.ndarray[float | int]:
-        """
-        The function calculates current direction of descent (see more information in README).
-
-        :param x_current: np.ndarray with values of origin function variables at current point.
-        :param beta_current: Value of descent step size.
-        :param s_previous: np.ndarray with values of descent direction vector at previous point.
-        :param h_previous: Special matrix H, used for this modification.
-        :param iteration: Number of current iteration.
-
-        :return: np.ndarray with values of descent direction vector.
-        """
-
-        symbol_value_mapping = get_symbol_value_mapping(self.free_symbols, x_current, self.dimension)
-
-        if iteration == 0:
-            s_0 = []
-            for i in range(self.dimension):
-                s_0.append(get_anti_derivative(self.function, self.free_symbols[i]).subs(symbol_value_mapping))
-            return np.array(s_0)
-
-        else:
-            x_current_anti_gradient = []
-            for i in range(self.dimension):
-                x_current_anti_gradient.append(get_anti_derivative(self.function,
-                                                                   self.free_symbols[i]).subs(symbol_value_mapping))
-
-            x_current_anti_gradient_np = np.array(x_current_anti_gradient)
-            s_previous_np = np.array(s_previous)
-
-            return x_current_anti_gradient_np + beta_current * np.dot(h_previous, s_previous_np)
+        super().__init__(function, x_0, min_point, accuracy, iteration_threshold, alpha_k_calculating_method, alpha_0)
 
     def run_method(self) -> Tuple[np.ndarray[float | int], int | float]:
         """
@@ -75,104 +41,139 @@ class ConjugateGradientsFirstModification(ABCMinimisationMethod):
         modification.
 
         :return: tuple with np.ndarray of Function value at each iteration and Function value at known minimum point.
-                 These data will be used to plot the graph.
+                 These data will be used to plot the graph. The points of the iterations are saved in x_history.
         """
 
-        start_time = datetime.now()
-        function_value_at_known_min_point = get_function_value_at_k_point(function=self.function,
-                                                                          free_symbols=self.free_symbols,
-                                                                          x_current=self.min_point,
-                                                                          dimension=self.dimension)
+        # attributes, which are used at every iteration, are bound to local variables
+        function, free_symbols, dimension, accuracy = self.function, self.free_symbols, self.dimension, self.accuracy
+        numeric_function, gradient_function, function_and_gradient = self._f, self._grad, self._f_and_grad
+        alpha_k_calculating_method, alpha_0 = self.alpha_k_calculating_method, self.alpha_0
+        iteration_threshold = self.iteration_threshold
 
-        iteration_counter = 0
-        list_of_function_value_at_k_point = [get_function_value_at_k_point(function=self.function,
-                                                                           free_symbols=self.free_symbols,
-                                                                           x_current=self.x_0,
-                                                                           dimension=self.dimension)]
+        start_time = time.perf_counter_ns()
+        function_value_at_known_min_point = self.known_min_value
+
+        workspace = CGWorkspace(dimension)
 
-        x_current = self.x_0
-        x_previous = np.array([])
-        s_previous = np.array([])
-        h_previous = np.eye(self.dimension)
+        iteration_counter = 0
+        # there can be at most iteration_threshold + 1 iterations, plus the value at the starting point
+        function_values_at_k_point = np.empty(iteration_threshold + 2, dtype=np.float64)
+        function_values_at_k_point[0] = numeric_function(self.x_0)
+        # points of all the iterations are kept in one preallocated array, one row per point
+        x_history = np.empty((iteration_threshold + 2, dimension), dtype=np.float64)
+        x_history[0] = self.x_0
+
+        # the points are kept in preallocated buffers, which are rotated at every iteration
+        x_current = self.x_0.copy()
+        x_previous = np.empty_like(x_current)
+        x_previous_previous = np.empty_like(x_current)
+        x_next = np.empty_like(x_current)
+        # direction of descent at previous point, it is not used at the first iteration
+        s_previous = np.zeros_like(x_current)
+        # buffer for direction of descent at current point, it is rotated with the previous one
+        s_current = np.empty_like(x_current)
+        # squared norm of gradient at previous point, it is not used at the first iteration
+        previous_gradient_squared_norm = 0.0
+        h_previous = np.eye(dimension)
+
+        # gradient at current point, at the next iterations it is calculated once for the stopping criteria
+        current_gradient = get_gradient_value_at_k_point(gradient_function, x_current)
+        # gradient at previous point, it is not used until the second iteration
+        previous_gradient = current_gradient
 
         while True:
-            if iteration_counter > self.iteration_threshold:
+            if iteration_counter > iteration_threshold:
                 self.print_result_info(min_point=x_current,
                                        iteration_number=iteration_counter,
-                                       time=datetime.now() - start_time,
-                                       reached_min_func_value=list_of_function_value_at_k_point[-1],
-                                       started_func_value=list_of_function_value_at_k_point[0],
+                                       time=self.get_elapsed_time(start_time),
+                                       reached_min_func_value=function_values_at_k_point[iteration_counter],
+                                       started_func_value=function_values_at_k_point[0],
                                        known_min_function_value=function_value_at_known_min_point,
                                        additional_message="!!!!!!!!! THRESHOLD !!!!!!!!!\n")
                 break
 
-            beta_current = get_beta_k(function=self.function,
-                                      free_symbols=self.free_symbols,
-                                      x_current=x_current,
-                                      x_previous=x_previous,
-                                      iteration_number=iteration_counter,
-                                      dimension=self.dimension)
+            current_gradient_squared_norm = float(current_gradient @ current_gradient)
 
-            s_current = self._get_s_k_first_modification(x_current=x_current,
-                                                         beta_current=beta_current,
-                                                         s_previous=s_previous,
-                                                         h_previous=h_previous,
-                                                         iteration=iteration_counter)
+            beta_current = get_beta_k(current_gradient_squared_norm=current_gradient_squared_norm,
+                                      previous_gradient_squared_norm=previous_gradient_squared_norm,
+                                      iteration_number=iteration_counter,
+                                      dimension=dimension)
+            previous_gradient_squared_norm = current_gradient_squared_norm
+
+            s_current = get_s_k(anti_gradient=-current_gradient,
+                                beta_current=beta_current,
+                                s_previous=s_previous,
+                                h_previous=h_previous,
+                                iteration=iteration_counter,
+                                out=s_current)
+
+            # the direction of descent is not finite, if the method diverged (e.g. H became singular)
+            if not np.isfinite(s_current).all():
+                self.print_result_info(min_point=x_current,
+                                       iteration_number=iteration_counter,
+                                       time=self.get_elapsed_time(start_time),
+                                       reached_min_func_value=function_values_at_k_point[iteration_counter],
+                                       started_func_value=function_values_at_k_point[0],
+                                       known_min_function_value=function_value_at_known_min_point,
+                                       additional_message="!!!!!!!!! ENTRAPMENT !!!!!!!!!\n")
+                break
 
-            alpha_current = self.alpha_k_calculating_method(function=self.function,
-                                                            free_symbols=self.free_symbols,
-                                                            x_current=x_current,
-                                                            s_current=s_current,
-                                                            dimension=self.dimension)
+            # the first step (s_0 = -g_0) is the same for all the methods, so it may be already known
+            if iteration_counter == 0 and alpha_0 is not None:
+                alpha_current = alpha_0
+            else:
+                alpha_current = alpha_k_calculating_method(function=function,
+                                                           free_symbols=free_symbols,
+                                                           x_current=x_current,
+                                                           s_current=s_current,
+                                                           dimension=dimension)
 
             x_next = get_x_next(x_current=x_current,
                                 alpha_current=alpha_current,
-                                s_current=s_current)
-
-            list_of_function_value_at_k_point.append(get_function_value_at_k_point(function=self.function,
-                                                                                   free_symbols=self.free_symbols,
-                                                                                   x_current=x_next,
-                                                                                   dimension=self.dimension))
+                                s_current=s_current,
+                                out=x_next)
+
+            # the value and the gradient at the new point are calculated together
+            next_function_value, next_gradient = get_function_and_gradient_value_at_k_point(function_and_gradient,
+                                                                                            x_next)
+            function_values_at_k_point[iteration_counter + 1] = next_function_value
+            x_history[iteration_counter + 1] = x_next
             iteration_counter += 1
 
-            try:
-                if check_all_criteria(function=self.function,
-                                      free_symbols=self.free_symbols,
-                                      x_current=x_next,
-                                      x_previous=x_current,
-                                      dimension=self.dimension,
-                                      accuracy=self.accuracy):
-
-                    self.print_result_info(min_point=x_next,
-                                           iteration_number=iteration_counter,
-                                           time=datetime.now() - start_time,
-                                           reached_min_func_value=list_of_function_value_at_k_point[-1],
-                                           started_func_value=list_of_function_value_at_k_point[0],
-                                           known_min_function_value=function_value_at_known_min_point)
-                    break
-
-                else:
-                    x_previous_previous = x_previous
-                    x_previous = x_current
-                    x_current = x_next
-                    s_previous = s_current
-                    if iteration_counter == 1:
-                        h_previous = np.eye(self.dimension)
-                    else:
-                        h_previous = get_h_k(function=self.function,
-                                             free_symbols=self.free_symbols,
-                                             x_next=x_previous,
-                                             x_current=x_previous_previous,
-                                             dimension=self.dimension,
-                                             h_previous=h_previous)
-            except TypeError:
-                self.print_result_info(min_point=x_current,
+            if check_all_criteria(function=function,
+                                  free_symbols=free_symbols,
+                                  x_current=x_next,
+                                  x_previous=x_current,
+                                  dimension=dimension,
+                                  accuracy=accuracy,
+                                  current_function_solution=function_values_at_k_point[iteration_counter],
+                                  previous_function_solution=function_values_at_k_point[iteration_counter - 1],
+                                  current_gradient=next_gradient):
+
+                self.print_result_info(min_point=x_next,
                                        iteration_number=iteration_counter,
-                                       time=datetime.now() - start_time,
-                                       reached_min_func_value=list_of_function_value_at_k_point[-1],
-                                       started_func_value=list_of_function_value_at_k_point[0],
-                                       known_min_function_value=function_value_at_known_min_point,
-                                       additional_message="!!!!!!!!! ENTRAPMENT !!!!!!!!!\n")
+                                       time=self.get_elapsed_time(start_time),
+                                       reached_min_func_value=function_values_at_k_point[iteration_counter],
+                                       started_func_value=function_values_at_k_point[0],
+                                       known_min_function_value=function_value_at_known_min_point)
                 break
 
-        return np.array(list_of_function_value_at_k_point), function_value_at_known_min_point
+            else:
+                x_previous_previous, x_previous, x_current, x_next = (x_previous, x_current, x_next,
+                                                                      x_previous_previous)
+                s_previous, s_current = s_current, s_previous
+                # matrix H is the identity one, which was created before the loop, until the second iteration,
+                # then it is updated in place
+                if iteration_counter > 1:
+                    # gradients at both points are already known, so their difference is not calculated again
+                    delta_y = np.subtract(current_gradient, previous_gradient, out=workspace.delta_y)
+                    h_previous = get_h_k(x_next=x_previous,
+                                         x_current=x_previous_previous,
+                                         dimension=dimension,
+                                         h_previous=h_previous,
+                                         workspace=workspace,
+                                         delta_y=delta_y)
+                previous_gradient, current_gradient = current_gradient, next_gradient
+
+        self.x_history = x_history[:iteration_counter + 1]
+        return function_values_at_k_point[:iteration_counter + 1], function_value_at_known_min_point
@@ -1,9 +1,11 @@
 import numpy as np
 import sympy
 
-from typing import List
+from typing import List, Callable
 
-from mathematics.general import get_symbol_value_mapping, get_derivative, get_norm_of_vector
+from mathematics.general import (get_function_value_at_k_point, get_gradient_value_at_k_point, build_gradient,
+                                 get_norm_of_vector)
+from mathematics.kernels import get_step_norms
 
 
 def check_first_stopping_criteria(function: sympy.core.add.Add,
@@ -11,7 +13,9 @@ def check_first_stopping_criteria(function: sympy.core.add.Add,
                                   x_current: np.ndarray[float | int],
                                   x_previous: np.ndarray[float | int],
                                   dimension: int,
-                                  accuracy: float) -> bool:
+                                  accuracy: float,
+                                  current_function_solution: float | None = None,
+                                  previous_function_solution: float | None = None) -> bool:
     """
     Function is checking the First Stopping Criteria. For more information about Stopping Criteria check README file.
 
@@ -21,15 +25,16 @@ def check_first_stopping_criteria(function: sympy.core.add.Add,
     :param x_previous: numpy.ndarray with previous function solutions.
     :param dimension: Number of unique variables in the function.
     :param accuracy: Given accuracy, with which we need to find the points of minimum of the function.
+    :param current_function_solution: Already known function value at x_current, it is calculated if not given.
+    :param previous_function_solution: Already known function value at x_previous, it is calculated if not given.
 
     :return: Boolean value whether the current solution fulfills the criteria.
     """
 
-    previous_symbol_value_mapping = get_symbol_value_mapping(free_symbols, x_previous, dimension)
-    current_symbol_value_mapping = get_symbol_value_mapping(free_symbols, x_current, dimension)
-
-    previous_function_solution = function.subs(previous_symbol_value_mapping)
-    current_function_solution = function.subs(current_symbol_value_mapping)
+    if previous_function_solution is None:
+        previous_function_solution = get_function_value_at_k_point(function, free_symbols, x_previous, dimension)
+    if current_function_solution is None:
+        current_function_solution = get_function_value_at_k_point(function, free_symbols, x_current, dimension)
 
     return previous_function_solution - current_function_solution < accuracy * (1 + abs(current_function_solution))
 
@@ -47,14 +52,19 @@ def check_second_stopping_criteria(x_current: np.ndarray[float | int],
     :return: Boolean value whether the current solution fulfills the criteria.
     """
 
-    return get_norm_of_vector(x_previous - x_current) < accuracy ** 0.5 * (1 + get_norm_of_vector(x_current))
+    step_norm, point_norm = get_step_norms(np.asarray(x_current, dtype=np.float64),
+                                           np.asarray(x_previous, dtype=np.float64))
+    return step_norm < accuracy ** 0.5 * (1 + point_norm)
 
 
 def check_third_stopping_criteria(function: sympy.core.add.Add,
                                   free_symbols: List[sympy.Symbol],
                                   x_current: np.ndarray[float | int],
                                   dimension: int,
-                                  accuracy: float) -> bool:
+                                  accuracy: float,
+                                  current_function_solution: float | None = None,
+                                  gradient_function: Callable | None = None,
+                                  current_gradient: np.ndarray[float] | None = None) -> bool:
     """
     Function is checking the Third Stopping Criteria. For more information about Stopping Criteria check README file.
 
@@ -63,20 +73,22 @@ def check_third_stopping_criteria(function: sympy.core.add.Add,
     :param x_current: numpy.ndarray with current function solutions.
     :param dimension: Number of unique variables in the function.
     :param accuracy: Given accuracy, with which we need to find the points of minimum of the function.
+    :param current_function_solution: Already known function value at x_current, it is calculated if not given.
+    :param gradient_function: Numeric gradient of the function, it is built with build_gradient() if not given.
+    :param current_gradient: Already known gradient at x_current, it is calculated with gradient_function if not given.
 
     :return: Boolean value whether the current solution fulfills the criteria.
     """
 
-    symbol_value_mapping = get_symbol_value_mapping(free_symbols, x_current, dimension)
-
-    function_derivative_with_substitution = []
-    for i in range(dimension):
-        function_derivative_with_substitution.append(get_derivative(function, free_symbols[i]).
-                                                     subs(symbol_value_mapping))
+    if current_gradient is None:
+        if gradient_function is None:
+            gradient_function = build_gradient(function, free_symbols)
+        current_gradient = get_gradient_value_at_k_point(gradient_function, x_current)
 
-    current_function_solution = function.subs(symbol_value_mapping)
+    if current_function_solution is None:
+        current_function_solution = get_function_value_at_k_point(function, free_symbols, x_current, dimension)
 
-    return (get_norm_of_vector(np.array(function_derivative_with_substitution))
+    return (get_norm_of_vector(current_gradient)
             <= accuracy ** (1 / 3) * (1 + abs(current_function_solution)))
 
 
@@ -85,9 +97,15 @@ def check_all_criteria(function: sympy.core.add.Add,
                        x_current: np.ndarray[float | int],
                        x_previous: np.ndarray[float | int],
                        dimension: int,
-                       accuracy: float) -> bool:
+                       accuracy: float,
+                       current_function_solution: float | None = None,
+                       previous_function_solution: float | None = None,
+                       gradient_function: Callable | None = None,
+                       current_gradient: np.ndarray[float] | None = None) -> bool:
     """
     Function is checking all the Stopping Criteria. For more information about Stopping Criteria check README file.
+    The function values and the gradient (or the function, which calculates it), which are already known by the
+    minimization method, can be passed, so they are not calculated again.
 
     :param function: Origin function which was transformed with sympy.sympify().
     :param free_symbols: List of unique sympy.Symbols, which are the function variables.
@@ -95,23 +113,33 @@ def check_all_criteria(function: sympy.core.add.Add,
     :param x_previous: numpy.ndarray with previous function solutions.
     :param dimension: Number of unique variables in the function.
     :param accuracy: Given accuracy, with which we need to find the points of minimum of the function.
+    :param current_function_solution: Already known function value at x_current.
+    :param previous_function_solution: Already known function value at x_previous.
+    :param gradient_function: Numeric gradient of the function.
+    :param current_gradient: Already known gradient at x_current.
 
     :return: Boolean value whether the current solution fulfills all the criteria.
     """
 
-    return all([check_first_stopping_criteria(function=function,
-                                              free_symbols=free_symbols,
-                                              x_current=x_current,
-                                              x_previous=x_previous,
-                                              dimension=dimension,
-                                              accuracy=accuracy),
-
-                check_second_stopping_criteria(x_current=x_current,
+    # criteria are checked one by one, so the rest of them are not calculated, once any criteria is not fulfilled
+    return (check_first_stopping_criteria(function=function,
+                                          free_symbols=free_symbols,
+                                          x_current=x_current,
+                                          x_previous=x_previous,
+                                          dimension=dimension,
+                                          accuracy=accuracy,
+                                          current_function_solution=current_function_solution,
+                                          previous_function_solution=previous_function_solution)
+
+            and check_second_stopping_criteria(x_current=x_current,
                                                x_previous=x_previous,
-                                               accuracy=accuracy),
+                                               accuracy=accuracy)
 
-                check_third_stopping_criteria(function=function,
+            and check_third_stopping_criteria(function=function,
                                               free_symbols=free_symbols,
                                               x_current=x_current,
                                               dimension=dimension,
-                                              accuracy=accuracy)])
+                                              accuracy=accuracy,
+                                              current_function_solution=current_function_solution,
+                                              gradient_function=gradient_function,
+                                              current_gradient=current_gradient))